@@ -1,4 +1,5 @@
 from fastapi import FastAPI, APIRouter
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -19,16 +20,24 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app without a prefix
-app = FastAPI()
+# Create the main app without a prefix, serializing responses with orjson
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 # Import and configure Vinted routes
-from vinted_routes import vinted_router, set_db as set_vinted_db
+from vinted_routes import vinted_router, set_db as set_vinted_db, set_cache as set_vinted_cache, ensure_indexes as ensure_vinted_indexes
 set_vinted_db(db)
 
+# Optional Redis cache for read-heavy Vinted endpoints
+redis_url = os.environ.get('REDIS_URL')
+redis_client = None
+if redis_url:
+    import redis.asyncio as aioredis
+    redis_client = aioredis.from_url(redis_url)
+    set_vinted_cache(redis_client)
+
 
 # Define Models
 class StatusCheck(BaseModel):
@@ -89,6 +98,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_db_indexes():
+    await ensure_vinted_indexes()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+    if redis_client is not None:
+        await redis_client.aclose()
\ No newline at end of file
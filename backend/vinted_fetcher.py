@@ -4,11 +4,26 @@ Scrapes public search results page
 """
 import requests
 import time
+import threading
 import logging
 import re
-import json
-from typing import Dict, List, Any, Optional
-from bs4 import BeautifulSoup
+import orjson
+from typing import Dict, List, Any, Iterator, Optional, Tuple, TypedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+# selectolax wraps the lexbor C parser; BeautifulSoup is used when it is not installed
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# RE2 matches in linear time with no backtracking; fall back to re when not installed
+try:
+    import re2 as _re_engine
+except ImportError:
+    _re_engine = re
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +32,8 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.9,fr;q=0.8",
-    "Accept-Encoding": "gzip, deflate, br",
+    # Only advertise encodings urllib3 can decode (br needs the brotli package)
+    "Accept-Encoding": ACCEPT_ENCODING,
     "Connection": "keep-alive",
     "Upgrade-Insecure-Requests": "1",
     "Sec-Fetch-Dest": "document",
@@ -40,6 +56,120 @@ VINTED_DOMAINS = {
 }
 
 
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    Allows short bursts up to `capacity` requests, then `rate` requests per second.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Take one token and return how long the caller must sleep before
+        sending its request (0 when a token was available).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+# Rate limiting - gentle, at most 1 request per second after a small burst
+_LIMITER = TokenBucket(rate=1.0, capacity=3)
+
+# Next.js state script, located with plain substring search
+_NEXT_DATA_OPEN = '<script id="__NEXT_DATA__" type="application/json">'
+_NEXT_DATA_OPEN_BYTES = _NEXT_DATA_OPEN.encode()
+
+# Preloaded-state patterns, most likely first, each paired with a literal sentinel
+# so pages without it skip the scan entirely. These full-page scans go through RE2
+# when available, so they stay compatible with both engines (inline flags, no
+# backreferences or lookarounds).
+_PRELOAD_PATTERNS = (
+    ("__PRELOADED_STATE__", _re_engine.compile(r'(?s)window\.__PRELOADED_STATE__\s*=\s*(\{.*?\});')),
+    ("__INITIAL_STATE__", _re_engine.compile(r'(?s)window\.__INITIAL_STATE__\s*=\s*(\{.*?\});')),
+    ('"items":', _re_engine.compile(r'(?s)"items":\s*(\[\{.*?\}\])')),
+)
+
+# Patterns used on links and short text nodes
+_ITEM_LINK_RE = re.compile(r'/items/(\d+)')
+_PRICE_TEXT_RE = re.compile(r'[\d,\.]+\s*[€$£]')
+_PRICE_RE = re.compile(r'([\d,\.]+)')
+
+# Streamed page reads stop once the Next.js state has been received
+STREAM_CHUNK_SIZE = 65536
+
+# Larger responses are abandoned instead of being buffered in memory
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+# Largest page size served by the Vinted catalog
+MAX_PER_PAGE = 96
+
+EXTRACT_FAILED_REASON = "Could not extract items - Vinted structure changed or blocked"
+
+# Live fetch results keyed by search params: key -> {result, fetched_at, etag, last_modified}.
+# Entries outlive the TTL so their validators can be used for conditional requests.
+CACHE_TTL_SECONDS = 20
+CACHE_MAX_ENTRIES = 512
+_RESPONSE_CACHE: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+
+# One keep-alive session per domain, reused across fetches: domain -> (session, cookies_acquired_at)
+COOKIE_TTL_SECONDS = 3600
+_SESSIONS: Dict[str, Tuple[requests.Session, float]] = {}
+
+
+def _get_session(domain: str) -> requests.Session:
+    """
+    Get the shared session for a Vinted domain, creating it on first use.
+    The session keeps its connection pool and cookies between fetches;
+    cookies are re-warmed only when missing, expired or invalidated.
+    """
+    entry = _SESSIONS.get(domain)
+    if entry is not None:
+        session, cookies_acquired_at = entry
+    else:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+        )
+        session.mount("https://", adapter)
+        cookies_acquired_at = 0.0
+    
+    if not session.cookies or time.monotonic() - cookies_acquired_at > COOKIE_TTL_SECONDS:
+        # Warm up cookies with a single visit to the home page. Only the Set-Cookie
+        # headers matter: the body is drained up to the cap so the connection is reused
+        try:
+            with session.get(f"https://{domain}", timeout=30, stream=True) as response:
+                for _ in _iter_capped(response.iter_content(STREAM_CHUNK_SIZE)):
+                    pass
+            cookies_acquired_at = time.monotonic()
+        except (requests.RequestException, RuntimeError) as e:
+            logger.warning(f"Cookie warm-up failed for {domain}: {e}")
+    
+    _SESSIONS[domain] = (session, cookies_acquired_at)
+    return session
+
+
+def _invalidate_cookies(domain: str) -> None:
+    """Force a cookie warm-up on the next fetch for this domain."""
+    entry = _SESSIONS.get(domain)
+    if entry is not None:
+        _SESSIONS[domain] = (entry[0], 0.0)
+
+
 def fetch_vinted_items(
     search_text: str = "",
     catalog_ids: Optional[List[int]] = None,
@@ -48,8 +178,9 @@ def fetch_vinted_items(
     price_from: Optional[float] = None,
     price_to: Optional[float] = None,
     order: str = "newest_first",
-    per_page: int = 20,
-    country: str = "fr"
+    per_page: int = MAX_PER_PAGE,
+    country: str = "fr",
+    page: int = 1
 ) -> Dict[str, Any]:
     """
     Fetch items from Vinted by scraping the search page.
@@ -63,16 +194,149 @@ def fetch_vinted_items(
         price_from: Minimum price (optional)
         price_to: Maximum price (optional)
         order: Sort order
-        per_page: Number of items to fetch
+        per_page: Number of items to fetch (capped at MAX_PER_PAGE)
         country: Country code
+        page: Result page number, starting at 1
     
     Returns:
-        List of item dictionaries
+        Dict with the items list, source ("live", "stale" or "mock"),
+        is_mock flag and blocked_reason
     """
     domain = VINTED_DOMAINS.get(country, "www.vinted.fr")
+    per_page = min(per_page, MAX_PER_PAGE)
     
-    # Build search URL with query params
-    base_url = f"https://{domain}/catalog"
+    # Identical searches within the TTL are served from memory
+    cache_key = (
+        domain,
+        search_text,
+        tuple(catalog_ids or ()),
+        tuple(brand_ids or ()),
+        tuple(size_ids or ()),
+        price_from,
+        price_to,
+        order,
+        per_page,
+        page,
+    )
+    cached = _RESPONSE_CACHE.get(cache_key)
+    conditional_headers = {}
+    if cached is not None:
+        if time.monotonic() - cached["fetched_at"] < CACHE_TTL_SECONDS:
+            logger.info(f"[SOURCE=cache] Returning cached items for {domain} search '{search_text}'")
+            return cached["result"]
+        
+        # Let Vinted answer 304 Not Modified if the page has not changed
+        if cached["etag"]:
+            conditional_headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            conditional_headers["If-Modified-Since"] = cached["last_modified"]
+    
+    result, validators = _fetch_catalog(
+        domain, search_text, catalog_ids, brand_ids, price_from, price_to, order, per_page, page,
+        conditional_headers
+    )
+    
+    if result is None:
+        if not conditional_headers:
+            # A 304 only makes sense for a request that carried the cached validators
+            blocked_reason = "Vinted returned status 304 without a cached page"
+            logger.error(f"[SOURCE=mock] {blocked_reason}")
+            return mock_result(search_text, per_page, blocked_reason)
+        
+        logger.info(f"[SOURCE=cache] Vinted page not modified for {domain} search '{search_text}'")
+        cached["fetched_at"] = time.monotonic()
+        return cached["result"]
+    
+    if not result["is_mock"]:
+        _store_cached_result(cache_key, result, validators)
+        return result
+    
+    # Prefer recently fetched live items over mock data when the fetch fails
+    if cached is not None and time.monotonic() - cached["fetched_at"] < 2 * CACHE_TTL_SECONDS:
+        logger.warning(f"[SOURCE=stale] Serving stale items: {result['blocked_reason']}")
+        return {**cached["result"], "source": "stale", "blocked_reason": result["blocked_reason"]}
+    
+    return result
+
+
+def fetch_all_vinted_items(
+    search_text: str = "",
+    catalog_ids: Optional[List[int]] = None,
+    brand_ids: Optional[List[int]] = None,
+    size_ids: Optional[List[int]] = None,
+    price_from: Optional[float] = None,
+    price_to: Optional[float] = None,
+    order: str = "newest_first",
+    max_items: int = MAX_PER_PAGE,
+    country: str = "fr"
+) -> Dict[str, Any]:
+    """
+    Fetch up to max_items items by walking the search result pages.
+    Pages hold MAX_PER_PAGE items, so large fetches need as few requests as possible.
+    Stops at the first short page, or when a page cannot be scraped live.
+    
+    Returns:
+        Dict shaped like the result of fetch_vinted_items
+    """
+    items = []
+    page = 1
+    while len(items) < max_items:
+        result = fetch_vinted_items(
+            search_text=search_text,
+            catalog_ids=catalog_ids,
+            brand_ids=brand_ids,
+            size_ids=size_ids,
+            price_from=price_from,
+            price_to=price_to,
+            order=order,
+            per_page=MAX_PER_PAGE,
+            country=country,
+            page=page
+        )
+        if result["source"] != "live":
+            # Keep the live pages gathered so far rather than mixing in stale or mock items
+            if items:
+                break
+            result["items"] = result["items"][:max_items]
+            return result
+        
+        items.extend(result["items"])
+        if len(result["items"]) < MAX_PER_PAGE:
+            break
+        page += 1
+    
+    return live_result(items[:max_items])
+
+
+def _store_cached_result(
+    cache_key: Tuple[Any, ...],
+    result: Dict[str, Any],
+    validators: Dict[str, Optional[str]]
+) -> None:
+    """Store a live fetch result with its cache validators, evicting the oldest entry when full."""
+    _RESPONSE_CACHE.pop(cache_key, None)
+    if len(_RESPONSE_CACHE) >= CACHE_MAX_ENTRIES:
+        # Tolerate another thread evicting the same entry first
+        _RESPONSE_CACHE.pop(next(iter(_RESPONSE_CACHE)), None)
+    _RESPONSE_CACHE[cache_key] = {
+        "result": result,
+        "fetched_at": time.monotonic(),
+        "etag": validators.get("etag"),
+        "last_modified": validators.get("last_modified"),
+    }
+
+
+def build_search_params(
+    search_text: str = "",
+    catalog_ids: Optional[List[int]] = None,
+    brand_ids: Optional[List[int]] = None,
+    price_from: Optional[float] = None,
+    price_to: Optional[float] = None,
+    order: str = "newest_first",
+    per_page: int = MAX_PER_PAGE,
+    page: int = 1
+) -> Dict[str, Any]:
+    """Build the query params of a Vinted catalog search page."""
     params = {}
     
     if search_text:
@@ -87,110 +351,281 @@ def fetch_vinted_items(
         params["price_to"] = price_to
     if order:
         params["order"] = order
+    params["per_page"] = per_page
+    if page > 1:
+        params["page"] = page
+    
+    return params
+
+
+def extract_items(html: str, domain: str, per_page: int) -> List[Dict[str, Any]]:
+    """
+    Extract raw items from a Vinted catalog page.
+    Tries the embedded JSON state first, then falls back to parsing the HTML.
+    Returns an empty list when nothing could be extracted.
+    """
+    items = []
+    
+    # Method 1: Try to find __NEXT_DATA__ (Vinted uses Next.js)
+    next_data_payload = None
+    start = html.find(_NEXT_DATA_OPEN)
+    if start != -1:
+        start += len(_NEXT_DATA_OPEN)
+        end = html.find('</script>', start)
+        if end != -1:
+            next_data_payload = html[start:end]
+    if next_data_payload:
+        try:
+            next_data = orjson.loads(next_data_payload)
+            # Navigate through Next.js data structure
+            page_props = next_data.get("props", {}).get("pageProps", {})
+            catalog = page_props.get("catalog", {})
+            items = catalog.get("items", [])
+            if items:
+                logger.info(f"[SOURCE=live] Found {len(items)} items via __NEXT_DATA__")
+                return items[:per_page]
+        except orjson.JSONDecodeError as e:
+            logger.debug(f"Failed to parse __NEXT_DATA__: {e}")
+    
+    # Method 2: Try to find preloaded state
+    for sentinel, pattern in _PRELOAD_PATTERNS:
+        if sentinel not in html:
+            continue
+        match = pattern.search(html)
+        if match:
+            try:
+                data = orjson.loads(match.group(1))
+                if isinstance(data, list):
+                    items = data
+                elif isinstance(data, dict):
+                    items = data.get("catalog", {}).get("items", []) or data.get("items", [])
+                
+                if items:
+                    logger.info(f"[SOURCE=live] Found {len(items)} items via pattern")
+                    return items[:per_page]
+            except orjson.JSONDecodeError:
+                continue
+    
+    # Method 3: Parse HTML directly
+    if LexborHTMLParser is not None:
+        items = _scrape_html_lexbor(html, domain, per_page)
+    else:
+        items = _scrape_html_soup(html, domain, per_page)
+    
+    if items:
+        logger.info(f"[SOURCE=live] Scraped {len(items)} items from HTML")
+    return items[:per_page]
+
+
+def _scrape_html_lexbor(html: str, domain: str, per_page: int) -> List[Dict[str, Any]]:
+    """Scrape item links from the page HTML with selectolax (lexbor parser)."""
+    tree = LexborHTMLParser(html)
+    items = []
+    
+    # Look for item cards
+    item_elements = tree.css('div[data-testid*="grid-item"], div[data-testid*="catalog-item"]')
+    if not item_elements:
+        # Try other common selectors
+        item_elements = tree.css('div[class*="ItemBox"], div[class*="feed-grid__item"]')
+    
+    if not item_elements:
+        # Look for any links to item pages
+        for link in tree.css('a[href*="/items/"]'):
+            item_id_match = _ITEM_LINK_RE.search(link.attributes.get('href') or '')
+            if not item_id_match:
+                continue
+            item_id = item_id_match.group(1)
+            
+            # Try to find associated data
+            parent = link.parent
+            while parent is not None and parent.tag != 'div':
+                parent = parent.parent
+            title = link.attributes.get('title') or link.text(strip=True)[:100]
+            
+            # Look for price in nearby elements
+            price_text = ""
+            if parent is not None:
+                for node in parent.traverse(include_text=True):
+                    if node.tag == '-text' and _PRICE_TEXT_RE.search(node.text_content or ''):
+                        price_text = node.text_content.strip()
+                        break
+            
+            items.append({
+                "id": item_id,
+                "title": title,
+                "price": price_text or "0",
+                "url": f"https://{domain}/items/{item_id}"
+            })
+            if len(items) >= per_page:
+                break
+    
+    return items
+
+
+def _scrape_html_soup(html: str, domain: str, per_page: int) -> List[Dict[str, Any]]:
+    """Scrape item links from the page HTML with BeautifulSoup, used when selectolax is missing."""
+    # Imported here so the bs4 import cost is only paid when this fallback runs
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    items = []
+    
+    # Look for item cards
+    item_elements = soup.select('div[data-testid*="grid-item"], div[data-testid*="catalog-item"]')
+    if not item_elements:
+        # Try other common selectors
+        item_elements = soup.select('div[class*="ItemBox"], div[class*="feed-grid__item"]')
+    
+    if not item_elements:
+        # Look for any links to item pages
+        for link in soup.select('a[href*="/items/"]'):
+            item_id_match = _ITEM_LINK_RE.search(link.get('href', ''))
+            if not item_id_match:
+                continue
+            item_id = item_id_match.group(1)
+            
+            # Try to find associated data
+            parent = link.find_parent('div')
+            title = link.get('title', '') or link.get_text(strip=True)[:100]
+            
+            # Look for price in nearby elements
+            price_text = ""
+            price_el = parent.find(string=_PRICE_TEXT_RE) if parent else None
+            if price_el:
+                price_text = price_el.strip()
+            
+            items.append({
+                "id": item_id,
+                "title": title,
+                "price": price_text or "0",
+                "url": f"https://{domain}/items/{item_id}"
+            })
+            if len(items) >= per_page:
+                break
+    
+    return items
+
+
+def _iter_capped(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Pass chunks through, raising once more than MAX_BODY_BYTES have been read."""
+    total_bytes = 0
+    for chunk in chunks:
+        total_bytes += len(chunk)
+        if total_bytes > MAX_BODY_BYTES:
+            raise RuntimeError(f"response too large (over {MAX_BODY_BYTES} bytes)")
+        yield chunk
+
+
+def _read_until_next_data(chunks: Iterator[bytes]) -> bytearray:
+    """
+    Read a streamed page until the end of the __NEXT_DATA__ script.
+    Vinted embeds it early in the page, so the rest is usually never downloaded.
+    Reads everything when the script is not found.
+    """
+    body = bytearray()
+    start = -1
+    for chunk in chunks:
+        scan_from = max(0, len(body) - len(_NEXT_DATA_OPEN_BYTES))
+        body += chunk
+        if start == -1:
+            start = body.find(_NEXT_DATA_OPEN_BYTES, scan_from)
+            if start == -1:
+                continue
+            scan_from = start
+        if body.find(b'</script>', max(scan_from, start + len(_NEXT_DATA_OPEN_BYTES))) != -1:
+            break
+    return body
+
+
+def _fetch_catalog(
+    domain: str,
+    search_text: str,
+    catalog_ids: Optional[List[int]],
+    brand_ids: Optional[List[int]],
+    price_from: Optional[float],
+    price_to: Optional[float],
+    order: str,
+    per_page: int,
+    page: int,
+    conditional_headers: Dict[str, str]
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Optional[str]]]:
+    """
+    Scrape the catalog page of a Vinted domain.
+    Falls back to mock items when nothing can be extracted.
+    
+    Returns:
+        The fetch result (None when Vinted answered 304 Not Modified) and
+        the ETag / Last-Modified validators of the response
+    """
+    base_url = f"https://{domain}/catalog"
+    params = build_search_params(search_text, catalog_ids, brand_ids, price_from, price_to, order, per_page, page)
     
     logger.info(f"Fetching Vinted items from {domain} with params: {params}")
     
-    # Rate limiting - gentle delay
-    time.sleep(1)
+    wait = _LIMITER.acquire()
+    if wait > 0:
+        time.sleep(wait)
     
-    session = requests.Session()
-    session.headers.update(HEADERS)
+    session = _get_session(domain)
     
     try:
-        response = session.get(base_url, params=params, timeout=30)
-        logger.info(f"Vinted response status: {response.status_code}")
-        
-        if response.status_code != 200:
-            logger.error(f"Vinted returned status {response.status_code}")
-            return []
-        
-        html = response.text
-        items = []
-        
-        # Method 1: Try to find __NEXT_DATA__ (Vinted uses Next.js)
-        next_data_match = re.search(r'<script id="__NEXT_DATA__" type="application/json">({.*?})</script>', html, re.DOTALL)
-        if next_data_match:
-            try:
-                next_data = json.loads(next_data_match.group(1))
-                # Navigate through Next.js data structure
-                page_props = next_data.get("props", {}).get("pageProps", {})
-                catalog = page_props.get("catalog", {})
-                items = catalog.get("items", [])
-                if items:
-                    logger.info(f"[SOURCE=live] Found {len(items)} items via __NEXT_DATA__")
-                    return {"items": items[:per_page], "source": "live", "is_mock": False, "blocked_reason": None}
-            except json.JSONDecodeError as e:
-                logger.debug(f"Failed to parse __NEXT_DATA__: {e}")
-        
-        # Method 2: Try to find preloaded state
-        preload_patterns = [
-            r'window\.__PRELOADED_STATE__\s*=\s*({.*?});',
-            r'window\.__INITIAL_STATE__\s*=\s*({.*?});',
-            r'"items":\s*(\[{.*?}\])',
-        ]
-        
-        for pattern in preload_patterns:
-            match = re.search(pattern, html, re.DOTALL)
-            if match:
-                try:
-                    data = json.loads(match.group(1))
-                    if isinstance(data, list):
-                        items = data
-                    elif isinstance(data, dict):
-                        items = data.get("catalog", {}).get("items", []) or data.get("items", [])
-                    
-                    if items:
-                        logger.info(f"[SOURCE=live] Found {len(items)} items via pattern")
-                        return {"items": items[:per_page], "source": "live", "is_mock": False, "blocked_reason": None}
-                except json.JSONDecodeError:
-                    continue
-        
-        # Method 3: Parse HTML directly with BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Look for item cards
-        item_elements = soup.find_all('div', {'data-testid': re.compile(r'grid-item|catalog-item')})
-        if not item_elements:
-            # Try other common selectors
-            item_elements = soup.find_all('div', class_=re.compile(r'ItemBox|feed-grid__item'))
-        
-        if not item_elements:
-            # Look for any links to item pages
-            item_links = soup.find_all('a', href=re.compile(r'/items/\d+'))
-            for link in item_links[:per_page]:
-                item_id_match = re.search(r'/items/(\d+)', link.get('href', ''))
-                if item_id_match:
-                    item_id = item_id_match.group(1)
-                    
-                    # Try to find associated data
-                    parent = link.find_parent('div')
-                    title = link.get('title', '') or link.get_text(strip=True)[:100]
-                    
-                    # Look for price in nearby elements
-                    price_text = ""
-                    price_el = parent.find(string=re.compile(r'[\d,\.]+\s*[€$£]')) if parent else None
-                    if price_el:
-                        price_text = price_el.strip()
-                    
-                    items.append({
-                        "id": item_id,
-                        "title": title,
-                        "price": price_text or "0",
-                        "url": f"https://{domain}/items/{item_id}"
-                    })
+        with session.get(base_url, params=params, headers=conditional_headers, timeout=30, stream=True) as response:
+            logger.info(f"Vinted response status: {response.status_code}")
+            
+            if response.status_code == 304:
+                return None, {}
+            
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            
+            if response.status_code in (401, 403):
+                _invalidate_cookies(domain)
+            
+            if response.status_code != 200:
+                blocked_reason = f"Vinted returned status {response.status_code}"
+                logger.error(f"[SOURCE=mock] {blocked_reason}")
+                return mock_result(search_text, per_page, blocked_reason), {}
+            
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+                raise RuntimeError(f"response too large ({content_length} bytes)")
+            
+            encoding = response.encoding or "utf-8"
+            chunks = _iter_capped(response.iter_content(STREAM_CHUNK_SIZE))
+            body = _read_until_next_data(chunks)
+            items = extract_items(body.decode(encoding, errors="replace"), domain, per_page)
+            
+            if not items:
+                # The embedded JSON did not yield items, read the rest of the page for the fallbacks
+                head_size = len(body)
+                for chunk in chunks:
+                    body += chunk
+                if len(body) > head_size:
+                    items = extract_items(body.decode(encoding, errors="replace"), domain, per_page)
         
         if items:
-            logger.info(f"[SOURCE=live] Scraped {len(items)} items from HTML")
-            return {"items": items[:per_page], "source": "live", "is_mock": False, "blocked_reason": None}
+            return live_result(items), validators
         
-        blocked_reason = "Could not extract items - Vinted structure changed or blocked"
+        blocked_reason = EXTRACT_FAILED_REASON
         logger.warning(f"[SOURCE=mock] {blocked_reason}")
-        return {"items": generate_mock_items(search_text, per_page), "source": "mock", "is_mock": True, "blocked_reason": blocked_reason}
+        return mock_result(search_text, per_page, blocked_reason), {}
         
     except Exception as e:
         blocked_reason = f"Request failed: {str(e)}"
         logger.error(f"[SOURCE=mock] {blocked_reason}")
-        return {"items": generate_mock_items(search_text, per_page), "source": "mock", "is_mock": True, "blocked_reason": blocked_reason}
+        return mock_result(search_text, per_page, blocked_reason), {}
+
+
+def live_result(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap items scraped from Vinted into a fetch result."""
+    return {"items": items, "source": "live", "is_mock": False, "blocked_reason": None}
+
+
+def mock_result(search_text: str, per_page: int, blocked_reason: str) -> Dict[str, Any]:
+    """Build a fetch result of mock items for when Vinted could not be scraped."""
+    return {"items": generate_mock_items(search_text, per_page), "source": "mock", "is_mock": True, "blocked_reason": blocked_reason}
 
 
 def generate_mock_items(search_text: str, count: int = 20) -> List[Dict[str, Any]]:
@@ -199,16 +634,17 @@ def generate_mock_items(search_text: str, count: int = 20) -> List[Dict[str, Any
     This allows the system to be validated end-to-end.
     """
     import random
-    import hashlib
     
     base_prices = [15, 25, 35, 45, 55, 65, 75, 85, 95, 105]
     brands = ["Nike", "Adidas", "Puma", "Reebok", "New Balance", "Asics", "Vans", "Converse"]
     sizes = ["S", "M", "L", "XL", "36", "38", "40", "42", "44"]
     
+    # Deterministic IDs for the same search within the same hour
+    id_rng = random.Random(f"{search_text}_{time.time()//3600}")
+    
     items = []
     for i in range(count):
-        # Generate deterministic ID based on search + index
-        item_id = hashlib.md5(f"{search_text}_{i}_{time.time()//3600}".encode()).hexdigest()[:8]
+        item_id = f"{id_rng.getrandbits(32):08x}"
         
         items.append({
             "id": f"mock_{item_id}",
@@ -225,19 +661,42 @@ def generate_mock_items(search_text: str, count: int = 20) -> List[Dict[str, Any
     return items
 
 
-def parse_item(raw_item: Dict[str, Any]) -> Dict[str, Any]:
+class _ParsedItemFields(TypedDict):
+    item_id: str
+    title: str
+    price: float
+    price_cents: int
+    currency: str
+    brand: str
+    size: str
+    url: str
+    photo_url: str
+    is_mock: bool
+
+
+class ParsedItem(_ParsedItemFields, total=False):
+    """Normalized item; raw_json is only present when parsed with keep_raw=True."""
+    raw_json: Dict[str, Any]
+
+
+def parse_item(raw_item: Dict[str, Any], keep_raw: bool = False) -> ParsedItem:
     """
     Parse a raw Vinted item into a normalized structure.
     Handles both API, scraped, and mock data formats.
+    The raw item is only kept (as raw_json) when keep_raw is set, so parsed
+    items do not hold on to the full scraped payload by default.
     """
-    # Handle different price formats
-    price_data = raw_item.get("price", 0)
-    if isinstance(price_data, dict):
-        price = float(price_data.get("amount", 0))
-        currency = price_data.get("currency_code", "EUR")
+    get = raw_item.get
+    
+    # Handle different price formats, the dict form (catalog JSON, mock) being the common case.
+    # Exact class checks skip the isinstance MRO walk.
+    price_data = get("price")
+    if price_data.__class__ is dict:
+        price = float(price_data.get("amount") or 0)
+        currency = price_data.get("currency_code") or "EUR"
     elif isinstance(price_data, str):
         # Parse price string like "15,00 €" or "€15.00"
-        price_match = re.search(r'([\d,\.]+)', price_data.replace(',', '.'))
+        price_match = _PRICE_RE.search(price_data.replace(',', '.'))
         price = float(price_match.group(1)) if price_match else 0
         currency = "EUR"
     else:
@@ -245,26 +704,36 @@ def parse_item(raw_item: Dict[str, Any]) -> Dict[str, Any]:
         currency = "EUR"
     
     # Get item ID
-    item_id = raw_item.get("id") or raw_item.get("item_id") or ""
+    item_id = get("id") or get("item_id") or ""
     
     # Build URL
-    url = raw_item.get("url", "")
-    if not url and item_id:
-        url = f"https://www.vinted.fr/items/{item_id}"
+    url = get("url") or (f"https://www.vinted.fr/items/{item_id}" if item_id else "")
     
     # Photo URL
-    photo = raw_item.get("photo", {})
-    photo_url = photo.get("url", "") if isinstance(photo, dict) else str(photo)
+    photo = get("photo")
+    if photo.__class__ is dict:
+        photo_url = photo.get("url") or ""
+    else:
+        photo_url = str(photo) if photo else ""
     
-    return {
+    parsed: ParsedItem = {
         "item_id": str(item_id),
-        "title": raw_item.get("title", ""),
+        "title": get("title", ""),
         "price": price,
+        "price_cents": int(round(price * 100)),
         "currency": currency,
-        "brand": raw_item.get("brand_title", "") or raw_item.get("brand", ""),
-        "size": raw_item.get("size_title", "") or raw_item.get("size", ""),
+        "brand": get("brand_title") or get("brand") or "",
+        "size": get("size_title") or get("size") or "",
         "url": url,
         "photo_url": photo_url,
-        "is_mock": raw_item.get("_mock", False),
-        "raw_json": raw_item
+        "is_mock": get("_mock", False),
     }
+    if keep_raw:
+        parsed["raw_json"] = raw_item
+    return parsed
+
+
+def parse_items(raw_items: List[Dict[str, Any]], keep_raw: bool = False) -> List[ParsedItem]:
+    """Parse a page of raw Vinted items in one pass."""
+    parse = parse_item
+    return [parse(raw_item, keep_raw) for raw_item in raw_items]
@@ -0,0 +1,141 @@
+"""
+Vinted Async Fetcher - Runs several catalog searches concurrently
+Shares params building, extraction and rate limiting with vinted_fetcher
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Any
+
+import aiohttp
+
+from vinted_fetcher import (
+    EXTRACT_FAILED_REASON,
+    HEADERS,
+    MAX_BODY_BYTES,
+    MAX_PER_PAGE,
+    STREAM_CHUNK_SIZE,
+    VINTED_DOMAINS,
+    _LIMITER,
+    build_search_params,
+    extract_items,
+    live_result,
+    mock_result,
+)
+
+logger = logging.getLogger(__name__)
+
+# Max searches in flight at once
+MAX_CONCURRENT_FETCHES = 4
+
+
+async def fetch_many(queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fetch several Vinted searches concurrently over one keep-alive session.
+    
+    Args:
+        queries: Search dicts using the keyword arguments of fetch_vinted_items
+    
+    Returns:
+        One result dict per query, in the same order, shaped like the
+        result of fetch_vinted_items
+    """
+    if not queries:
+        return []
+    
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENT_FETCHES, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=30)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=timeout) as session:
+        # Warm up cookies once per domain before firing the searches
+        domains = {VINTED_DOMAINS.get(q.get("country", "fr"), "www.vinted.fr") for q in queries}
+        for domain in domains:
+            try:
+                async with session.get(f"https://{domain}") as response:
+                    # Only the cookies matter, drop the body chunk by chunk up to the cap
+                    async for _ in _iter_capped(response):
+                        pass
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+                logger.warning(f"Cookie warm-up failed for {domain}: {e}")
+        
+        return await asyncio.gather(*[_fetch_one(session, semaphore, q) for q in queries])
+
+
+async def _iter_capped(response: aiohttp.ClientResponse) -> AsyncIterator[bytes]:
+    """Stream the response body, raising once more than MAX_BODY_BYTES have been read."""
+    total_bytes = 0
+    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+        total_bytes += len(chunk)
+        if total_bytes > MAX_BODY_BYTES:
+            raise RuntimeError(f"response too large (over {MAX_BODY_BYTES} bytes)")
+        yield chunk
+
+
+async def _fetch_one(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    query: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Fetch a single search, falling back to mock items like fetch_vinted_items."""
+    search_text = query.get("search_text", "")
+    per_page = min(query.get("per_page", MAX_PER_PAGE), MAX_PER_PAGE)
+    domain = VINTED_DOMAINS.get(query.get("country", "fr"), "www.vinted.fr")
+    params = build_search_params(
+        search_text=search_text,
+        catalog_ids=query.get("catalog_ids"),
+        brand_ids=query.get("brand_ids"),
+        price_from=query.get("price_from"),
+        price_to=query.get("price_to"),
+        order=query.get("order", "newest_first"),
+        per_page=per_page,
+        page=query.get("page", 1),
+    )
+    
+    # aiohttp only accepts flat params, so expand list values into pairs
+    flat_params = []
+    for key, value in params.items():
+        for v in value if isinstance(value, list) else [value]:
+            flat_params.append((key, str(v)))
+    
+    async with semaphore:
+        wait = _LIMITER.acquire()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        
+        logger.info(f"Fetching Vinted items from {domain} with params: {params}")
+        
+        try:
+            async with session.get(f"https://{domain}/catalog", params=flat_params) as response:
+                logger.info(f"Vinted response status: {response.status}")
+                if response.status != 200:
+                    blocked_reason = f"Vinted returned status {response.status}"
+                    logger.error(f"[SOURCE=mock] {blocked_reason}")
+                    return mock_result(search_text, per_page, blocked_reason)
+                
+                if response.content_length and response.content_length > MAX_BODY_BYTES:
+                    raise RuntimeError(f"response too large ({response.content_length} bytes)")
+                
+                body = bytearray()
+                async for chunk in _iter_capped(response):
+                    body += chunk
+                # get_encoding() raises for text/html without a charset, default to UTF-8 instead
+                html = body.decode(response.charset or "utf-8", errors="replace")
+        except Exception as e:
+            blocked_reason = f"Request failed: {str(e)}"
+            logger.error(f"[SOURCE=mock] {blocked_reason}")
+            return mock_result(search_text, per_page, blocked_reason)
+    
+    # Extraction is CPU work, keep it off the event loop
+    try:
+        items = await asyncio.to_thread(extract_items, html, domain, per_page)
+    except Exception as e:
+        blocked_reason = f"Request failed: {str(e)}"
+        logger.error(f"[SOURCE=mock] {blocked_reason}")
+        return mock_result(search_text, per_page, blocked_reason)
+    
+    if items:
+        return live_result(items)
+    
+    blocked_reason = EXTRACT_FAILED_REASON
+    logger.warning(f"[SOURCE=mock] {blocked_reason}")
+    return mock_result(search_text, per_page, blocked_reason)
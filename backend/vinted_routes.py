@@ -1,15 +1,21 @@
 """
 Vinted API Routes - Endpoints for managing queries, fetching items, and computing stats
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Annotated, Optional, List, Dict, Any, AsyncIterator, Tuple
 from datetime import datetime, timezone
-import uuid
-import statistics
+import asyncio
 import logging
+import numpy as np
+import orjson
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 
-from vinted_fetcher import fetch_vinted_items, parse_item
+from vinted_fetcher import fetch_vinted_items, parse_items
+from vinted_fetcher_async import fetch_many
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +25,108 @@ vinted_router = APIRouter(prefix="/api/vinted", tags=["vinted"])
 # Will be set by server.py
 db = None
 
+# Items fetched per query run
+ITEMS_PER_FETCH = 20
+
+# Max items returned by one get_items call
+MAX_ITEMS_LIMIT = 500
+
+# Hard cap on saved queries loaded by list and fetch-all; a warning is logged when hit
+MAX_QUERIES = 100
+
+# Max queries being stored at once by fetch-all
+MAX_CONCURRENT_STORES = 8
+
+# Optional redis.asyncio client for caching read-heavy endpoints, set by server.py
+cache = None
+
+# Seconds before cached endpoint results expire
+CACHE_TTL_SECONDS = 30
+QUERIES_CACHE_KEY = "vinted:queries:all"
+
+# Query ids are ObjectId hex strings, or uuid4 strings for queries created before them.
+# Malformed ids are rejected with a 422 before any database round-trip
+QUERY_ID_PATTERN = r"^(?:[0-9a-f]{24}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$"
+QueryId = Annotated[str, Path(pattern=QUERY_ID_PATTERN)]
+
+# Most recent prices kept per query in the running stats doc, used for the median
+STATS_DIGEST_SIZE = 1000
+
 def set_db(database):
     global db
     db = database
 
 
+def set_cache(redis_client):
+    global cache
+    cache = redis_client
+
+
+def _stats_cache_key(query_id: str) -> str:
+    return f"vinted:stats:{query_id}"
+
+
+async def _cache_get(key: str) -> Optional[Any]:
+    """Read a cached value; cache failures are treated as misses."""
+    if cache is None:
+        return None
+    try:
+        cached = await cache.get(key)
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+    return orjson.loads(cached) if cached is not None else None
+
+
+async def _cache_set(key: str, value: Any) -> None:
+    if cache is None:
+        return
+    try:
+        await cache.set(key, orjson.dumps(value), ex=CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+
+
+async def _cache_delete(key: str) -> None:
+    if cache is None:
+        return
+    try:
+        await cache.delete(key)
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed for {key}: {e}")
+
+
+async def ensure_indexes():
+    """
+    Create the indexes used by the Vinted endpoints (no-op when they exist).
+    Failures are logged rather than raised so the app still boots without them.
+    """
+    if db is None:
+        return
+    
+    indexes = [
+        # Dedupe lookups by (query_id, item_id) become index seeks
+        (db.vinted_items, [("query_id", 1), ("item_id", 1)], True),
+        # Newest-first item listing per query
+        (db.vinted_items, [("query_id", 1), ("created_at", -1)], False),
+        # One stats row per query and day, read newest first
+        (db.vinted_stats_daily, [("query_id", 1), ("day", -1)], True),
+        # One running stats doc per query
+        (db.vinted_stats_running, [("query_id", 1)], True),
+    ]
+    for collection, keys, unique in indexes:
+        try:
+            await collection.create_index(keys, unique=unique)
+        except PyMongoError as e:
+            if getattr(e, "code", None) == 11000:
+                logger.error(
+                    f"Cannot create unique index {keys} on {collection.name}: duplicate documents "
+                    f"already exist, dedupe the collection and restart: {e}"
+                )
+            else:
+                logger.error(f"Failed to create index {keys} on {collection.name}: {e}")
+
+
 # ===== Pydantic Models =====
 
 class QueryCreate(BaseModel):
@@ -48,7 +151,7 @@ class FetchResult(BaseModel):
     items_fetched: int
     items_new: int
     items_existing: int
-    source: str  # "live" or "mock"
+    source: str  # "live", "stale" or "mock"
     is_mock: bool
     blocked_reason: Optional[str] = None
 
@@ -72,6 +175,235 @@ class LastFetchResponse(BaseModel):
     last_fetch_items_existing: Optional[int] = None
 
 
+# Projections matching the response models, for endpoints returning raw documents
+QUERY_RESPONSE_PROJECTION = {"_id": 0, **{field: 1 for field in QueryResponse.model_fields}}
+STATS_RESPONSE_PROJECTION = {"_id": 0, **{field: 1 for field in StatsResponse.model_fields}}
+
+
+# ===== Fetch Helpers =====
+
+def _cap_queries(queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Truncate a saved query listing loaded with MAX_QUERIES + 1 rows to MAX_QUERIES.
+    The extra row only tells whether queries were left out, in which case it is logged.
+    """
+    if len(queries) > MAX_QUERIES:
+        logger.warning(f"More than {MAX_QUERIES} saved queries, only the first {MAX_QUERIES} are used")
+    return queries[:MAX_QUERIES]
+
+
+def _search_params(query_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a saved query to the search arguments of the Vinted fetchers."""
+    return {
+        "search_text": query_json.get("search_text", ""),
+        "catalog_ids": query_json.get("catalog_ids"),
+        "brand_ids": query_json.get("brand_ids"),
+        "size_ids": query_json.get("size_ids"),
+        "price_from": query_json.get("price_from"),
+        "price_to": query_json.get("price_to"),
+        "per_page": ITEMS_PER_FETCH,
+    }
+
+
+async def _store_fetch_result(query_id: str, fetch_result: Dict[str, Any]) -> FetchResult:
+    """Store fetched items with dedupe and record the fetch metadata on the query."""
+    raw_items = fetch_result["items"]
+    source = fetch_result["source"]
+    is_mock = fetch_result["is_mock"]
+    blocked_reason = fetch_result["blocked_reason"]
+    
+    now = datetime.now(timezone.utc).isoformat()
+    
+    # Parse the whole page in one pass before any DB await. A page holds at most
+    # ITEMS_PER_FETCH items, so parsing inline is cheaper than a thread hand-off
+    parsed_items = parse_items(raw_items, keep_raw=True)
+    
+    # Dedupe by query_id + item_id and insert in one round-trip: each upsert inserts
+    # the item only if it is missing, so existing items are left untouched
+    ops = [
+        UpdateOne(
+            {"query_id": query_id, "item_id": parsed["item_id"]},
+            {"$setOnInsert": {
+                "id": str(ObjectId()),
+                "query_id": query_id,
+                "item_id": parsed["item_id"],
+                "title": parsed["title"],
+                "price": parsed["price"],
+                "price_cents": parsed["price_cents"],
+                "currency": parsed["currency"],
+                "brand": parsed["brand"],
+                "size": parsed["size"],
+                "url": parsed["url"],
+                "created_at": now,
+                "raw_json": parsed["raw_json"],
+                "in_running_stats": True
+            }},
+            upsert=True
+        )
+        for parsed in parsed_items
+    ]
+    
+    items_new = 0
+    if ops:
+        try:
+            result = await db.vinted_items.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: the other ops were still applied. Their new items are already
+            # marked in_running_stats, so fold them now or the seed skips them forever
+            upserted = sorted(op["index"] for op in e.details.get("upserted", []))
+            await _update_running_stats(query_id, [parsed_items[i]["price_cents"] for i in upserted])
+            raise
+        items_new = result.upserted_count
+        # upserted_ids is keyed by op index, so it points at the newly stored items
+        new_prices_cents = [parsed_items[i]["price_cents"] for i in sorted(result.upserted_ids)]
+        await _update_running_stats(query_id, new_prices_cents)
+    items_existing = len(ops) - items_new
+    
+    logger.info(f"[SOURCE={source}] Fetch complete for query {query_id}: {items_new} new, {items_existing} existing, is_mock={is_mock}")
+    
+    # Persist last fetch metadata to query doc
+    await db.vinted_queries.update_one(
+        {"id": query_id},
+        {"$set": {
+            "last_fetch_at": now,
+            "last_fetch_source": source,
+            "last_fetch_is_mock": is_mock,
+            "last_fetch_blocked_reason": blocked_reason,
+            "last_fetch_items_fetched": len(raw_items),
+            "last_fetch_items_new": items_new,
+            "last_fetch_items_existing": items_existing
+        }}
+    )
+    
+    return FetchResult(
+        query_id=query_id,
+        items_fetched=len(raw_items),
+        items_new=items_new,
+        items_existing=items_existing,
+        source=source,
+        is_mock=is_mock,
+        blocked_reason=blocked_reason
+    )
+
+
+# ===== Stats Helpers =====
+
+async def _update_running_stats(query_id: str, new_prices_cents: List[int]) -> None:
+    """Fold newly stored item prices (in cents) into the running stats doc of a query."""
+    new_prices_cents = [cents for cents in new_prices_cents if cents > 0]
+    if not new_prices_cents:
+        return
+    
+    # Always applied (creating the doc if needed): these items carry in_running_stats,
+    # so the seed never counts them a second time
+    await db.vinted_stats_running.update_one(
+        {"query_id": query_id},
+        {
+            "$inc": {"sum_cents": sum(new_prices_cents), "n": len(new_prices_cents)},
+            "$push": {"digest": {"$each": new_prices_cents, "$slice": -STATS_DIGEST_SIZE}}
+        },
+        upsert=True
+    )
+
+
+async def _seed_running_stats(query_id: str) -> Dict[str, Any]:
+    """
+    Fold the items stored before running stats existed into the running stats doc.
+    Those items lack in_running_stats and no new ones are ever written, so the set
+    scanned here is fixed and the fold is applied exactly once.
+    """
+    # Create the doc first so the fold below is a plain conditional update
+    await db.vinted_stats_running.update_one(
+        {"query_id": query_id},
+        {"$setOnInsert": {"sum_cents": 0, "n": 0, "digest": []}},
+        upsert=True
+    )
+    
+    match = {"query_id": query_id, "price": {"$gt": 0}, "in_running_stats": {"$exists": False}}
+    
+    # Items stored before price_cents existed only have the float price
+    totals = await db.vinted_items.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": None,
+            "sum_cents": {"$sum": {"$ifNull": ["$price_cents", {"$round": [{"$multiply": ["$price", 100]}, 0]}]}},
+            "n": {"$sum": 1}
+        }}
+    ]).to_list(1)
+    
+    # Newest prices first from the (query_id, created_at) index, stored oldest first
+    recent = await db.vinted_items.find(match, {"_id": 0, "price": 1, "price_cents": 1}).sort(
+        "created_at", -1
+    ).to_list(STATS_DIGEST_SIZE)
+    
+    # Older items go in front of the prices pushed by fetches so far; only one
+    # concurrent seed matches the unseeded doc
+    running = await db.vinted_stats_running.find_one_and_update(
+        {"query_id": query_id, "seeded": {"$ne": True}},
+        {
+            "$inc": {
+                "sum_cents": int(totals[0]["sum_cents"]) if totals else 0,
+                "n": totals[0]["n"] if totals else 0
+            },
+            "$push": {"digest": {
+                "$each": [
+                    item.get("price_cents", int(round(item["price"] * 100))) for item in reversed(recent)
+                ],
+                "$position": 0,
+                "$slice": -STATS_DIGEST_SIZE
+            }},
+            "$set": {"seeded": True}
+        },
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if running is None:
+        running = await db.vinted_stats_running.find_one({"query_id": query_id}, {"_id": 0})
+    return running
+
+
+def _running_price_stats(running: Dict[str, Any]) -> Tuple[Optional[float], Optional[float], int]:
+    """
+    Read (avg, median, count) in cents from a running stats doc in O(1).
+    The median is taken over the most recent STATS_DIGEST_SIZE prices.
+    """
+    n = running.get("n", 0)
+    digest = running.get("digest")
+    if not n or not digest:
+        return None, None, 0
+    return running["sum_cents"] / n, _median(np.asarray(digest, dtype=np.float64)), n
+
+
+def _median(values: np.ndarray) -> float:
+    """Median in O(n) via quickselect (np.partition) instead of a full sort."""
+    n = values.size
+    k = n // 2
+    part = np.partition(values, k)
+    if n & 1:
+        return float(part[k])
+    # Even count: average the k-th value with the largest value below it
+    return float(0.5 * (part[k] + part[:k].max()))
+
+
+# ===== Item Helpers =====
+
+async def _stream_items(query_id: str, first: Optional[Dict[str, Any]], cursor) -> AsyncIterator[bytes]:
+    """
+    Encode {"query_id", "items", "count"} chunk by chunk; count goes last once known.
+    The first item is read by the caller so an early database error still raises.
+    """
+    yield b'{"query_id":' + orjson.dumps(query_id) + b',"items":['
+    if first is None:
+        yield b'],"count":0}'
+        return
+    yield orjson.dumps(first)
+    count = 1
+    async for item in cursor:
+        yield b"," + orjson.dumps(item)
+        count += 1
+    yield b'],"count":' + str(count).encode() + b"}"
+
+
 # ===== Endpoints =====
 
 @vinted_router.post("/queries", response_model=QueryResponse)
@@ -80,7 +412,7 @@ async def create_query(query: QueryCreate):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
-    query_id = str(uuid.uuid4())
+    query_id = str(ObjectId())
     now = datetime.now(timezone.utc).isoformat()
     
     query_json = {
@@ -100,6 +432,7 @@ async def create_query(query: QueryCreate):
     }
     
     await db.vinted_queries.insert_one(doc)
+    await _cache_delete(QUERIES_CACHE_KEY)
     logger.info(f"Created query: {query_id} - {query.name}")
     
     return QueryResponse(
@@ -110,18 +443,57 @@ async def create_query(query: QueryCreate):
     )
 
 
-@vinted_router.get("/queries", response_model=List[QueryResponse])
+@vinted_router.get("/queries")
 async def list_queries():
-    """List all saved queries."""
+    """
+    List all saved queries.
+    Documents are projected to the QueryResponse fields in MongoDB and returned
+    as-is, skipping per-row model validation.
+    """
     if db is None:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
-    queries = await db.vinted_queries.find({}, {"_id": 0}).to_list(100)
-    return [QueryResponse(**q) for q in queries]
+    cached = await _cache_get(QUERIES_CACHE_KEY)
+    if cached is not None:
+        return cached
+    
+    # Only a cache miss can tell whether the listing was truncated, so the warning
+    # shows up once per CACHE_TTL_SECONDS rather than on every request
+    queries = _cap_queries(
+        await db.vinted_queries.find({}, QUERY_RESPONSE_PROJECTION).to_list(MAX_QUERIES + 1)
+    )
+    await _cache_set(QUERIES_CACHE_KEY, queries)
+    return queries
+
+
+@vinted_router.post("/queries/fetch-all", response_model=List[FetchResult])
+async def fetch_all_queries():
+    """
+    Trigger a fetch run for every saved query.
+    Searches run concurrently over one HTTP session, then results are stored in parallel.
+    """
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+    
+    queries = _cap_queries(
+        await db.vinted_queries.find({}, {"_id": 0, "id": 1, "query_json": 1}).to_list(MAX_QUERIES + 1)
+    )
+    
+    fetch_results = await fetch_many([_search_params(q["query_json"]) for q in queries])
+    
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_STORES)
+    
+    async def store(query_id: str, fetch_result: Dict[str, Any]) -> FetchResult:
+        async with semaphore:
+            return await _store_fetch_result(query_id, fetch_result)
+    
+    return await asyncio.gather(*[
+        store(q["id"], fetch_result) for q, fetch_result in zip(queries, fetch_results)
+    ])
 
 
 @vinted_router.post("/queries/{query_id}/fetch", response_model=FetchResult)
-async def fetch_for_query(query_id: str):
+async def fetch_for_query(query_id: QueryId):
     """
     Trigger a fetch run for a specific query.
     Fetches latest 20 items and stores them with dedupe.
@@ -134,85 +506,14 @@ async def fetch_for_query(query_id: str):
     if not query_doc:
         raise HTTPException(status_code=404, detail=f"Query {query_id} not found")
     
-    query_json = query_doc["query_json"]
-    
-    # Fetch items from Vinted
-    fetch_result = fetch_vinted_items(
-        search_text=query_json.get("search_text", ""),
-        catalog_ids=query_json.get("catalog_ids"),
-        brand_ids=query_json.get("brand_ids"),
-        size_ids=query_json.get("size_ids"),
-        price_from=query_json.get("price_from"),
-        price_to=query_json.get("price_to"),
-        per_page=20
-    )
+    # Fetch items from Vinted in a worker thread so the event loop keeps serving requests
+    fetch_result = await asyncio.to_thread(fetch_vinted_items, **_search_params(query_doc["query_json"]))
     
-    raw_items = fetch_result["items"]
-    source = fetch_result["source"]
-    is_mock = fetch_result["is_mock"]
-    blocked_reason = fetch_result["blocked_reason"]
-    
-    items_new = 0
-    items_existing = 0
-    now = datetime.now(timezone.utc).isoformat()
-    
-    for raw_item in raw_items:
-        parsed = parse_item(raw_item)
-        
-        # Check if item already exists (dedupe by query_id + item_id)
-        existing = await db.vinted_items.find_one({
-            "query_id": query_id,
-            "item_id": parsed["item_id"]
-        })
-        
-        if existing:
-            items_existing += 1
-        else:
-            doc = {
-                "id": str(uuid.uuid4()),
-                "query_id": query_id,
-                "item_id": parsed["item_id"],
-                "title": parsed["title"],
-                "price": parsed["price"],
-                "currency": parsed["currency"],
-                "brand": parsed["brand"],
-                "size": parsed["size"],
-                "url": parsed["url"],
-                "created_at": now,
-                "raw_json": parsed["raw_json"]
-            }
-            await db.vinted_items.insert_one(doc)
-            items_new += 1
-    
-    logger.info(f"[SOURCE={source}] Fetch complete for query {query_id}: {items_new} new, {items_existing} existing, is_mock={is_mock}")
-    
-    # Persist last fetch metadata to query doc
-    await db.vinted_queries.update_one(
-        {"id": query_id},
-        {"$set": {
-            "last_fetch_at": now,
-            "last_fetch_source": source,
-            "last_fetch_is_mock": is_mock,
-            "last_fetch_blocked_reason": blocked_reason,
-            "last_fetch_items_fetched": len(raw_items),
-            "last_fetch_items_new": items_new,
-            "last_fetch_items_existing": items_existing
-        }}
-    )
-    
-    return FetchResult(
-        query_id=query_id,
-        items_fetched=len(raw_items),
-        items_new=items_new,
-        items_existing=items_existing,
-        source=source,
-        is_mock=is_mock,
-        blocked_reason=blocked_reason
-    )
+    return await _store_fetch_result(query_id, fetch_result)
 
 
 @vinted_router.get("/queries/{query_id}/last-fetch", response_model=LastFetchResponse)
-async def get_last_fetch(query_id: str):
+async def get_last_fetch(query_id: QueryId):
     """Get metadata from the last fetch run for a query."""
     if db is None:
         raise HTTPException(status_code=500, detail="Database not initialized")
@@ -234,40 +535,35 @@ async def get_last_fetch(query_id: str):
 
 
 @vinted_router.post("/queries/{query_id}/stats", response_model=StatsResponse)
-async def compute_stats(query_id: str):
+async def compute_stats(query_id: QueryId):
     """
     Compute and store daily stats (avg, median, count) for a query.
     """
     if db is None:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
-    # Verify query exists
-    query_doc = await db.vinted_queries.find_one({"id": query_id}, {"_id": 0})
-    if not query_doc:
-        raise HTTPException(status_code=404, detail=f"Query {query_id} not found")
+    now_dt = datetime.now(timezone.utc)
+    today = now_dt.strftime("%Y-%m-%d")
+    now = now_dt.isoformat()
     
-    # Get all items for this query
-    items = await db.vinted_items.find(
-        {"query_id": query_id},
-        {"_id": 0, "price": 1}
-    ).to_list(10000)
-    
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    now = datetime.now(timezone.utc).isoformat()
+    # Running aggregates kept up to date by each fetch, seeded on first use. A running
+    # doc only exists for a known query, so the existence check is only needed without one
+    running = await db.vinted_stats_running.find_one({"query_id": query_id}, {"_id": 0})
+    if running is None or not running.get("seeded"):
+        if running is None and not await db.vinted_queries.find_one({"id": query_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail=f"Query {query_id} not found")
+        running = await _seed_running_stats(query_id)
     
-    prices = [item["price"] for item in items if item.get("price", 0) > 0]
-    
-    avg_price = None
-    median_price = None
-    item_count = len(prices)
-    
-    if prices:
-        avg_price = round(sum(prices) / len(prices), 2)
-        median_price = round(statistics.median(prices), 2)
+    avg_cents, median_cents, item_count = _running_price_stats(running)
+    avg_price = median_price = None
+    if item_count:
+        # Sums are exact in integer cents, convert to euros once at the edge
+        avg_price = round(avg_cents) / 100
+        median_price = round(median_cents) / 100
     
     # Upsert daily stats row
     stats_doc = {
-        "id": str(uuid.uuid4()),
+        "id": str(ObjectId()),
         "query_id": query_id,
         "day": today,
         "avg_price": avg_price,
@@ -282,6 +578,7 @@ async def compute_stats(query_id: str):
         {"$set": stats_doc},
         upsert=True
     )
+    await _cache_delete(_stats_cache_key(query_id))
     
     logger.info(f"Stats computed for query {query_id}: avg={avg_price}, median={median_price}, count={item_count}")
     
@@ -294,29 +591,48 @@ async def compute_stats(query_id: str):
     )
 
 
-@vinted_router.get("/queries/{query_id}/stats", response_model=List[StatsResponse])
-async def get_stats_history(query_id: str):
-    """Get historical stats for a query."""
+@vinted_router.get("/queries/{query_id}/stats")
+async def get_stats_history(query_id: QueryId):
+    """
+    Get historical stats for a query.
+    Rows are projected to the StatsResponse fields and returned as-is.
+    """
     if db is None:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
+    cache_key = _stats_cache_key(query_id)
+    cached = await _cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
     stats = await db.vinted_stats_daily.find(
         {"query_id": query_id},
-        {"_id": 0}
+        STATS_RESPONSE_PROJECTION
     ).sort("day", -1).to_list(100)
+    await _cache_set(cache_key, stats)
     
-    return [StatsResponse(**s) for s in stats]
+    return stats
 
 
 @vinted_router.get("/queries/{query_id}/items")
-async def get_items(query_id: str, limit: int = 50):
-    """Get items for a query."""
+async def get_items(query_id: QueryId, limit: int = Query(50, ge=1, le=MAX_ITEMS_LIMIT)):
+    """
+    Get items for a query.
+    Rows are streamed from the cursor as they arrive, so memory stays flat
+    whatever the limit and the first bytes go out before the last batch is read.
+    """
     if db is None:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
-    items = await db.vinted_items.find(
+    cursor = db.vinted_items.find(
         {"query_id": query_id},
-        {"_id": 0, "raw_json": 0}
-    ).sort("created_at", -1).to_list(limit)
+        {"_id": 0, "raw_json": 0, "in_running_stats": 0}
+    ).sort("created_at", -1).limit(limit).batch_size(50)
+    
+    # Read the first batch before the 200 goes out, so query errors still become a 500
+    try:
+        first = await cursor.next()
+    except StopAsyncIteration:
+        first = None
     
-    return {"query_id": query_id, "items": items, "count": len(items)}
+    return StreamingResponse(_stream_items(query_id, first, cursor), media_type="application/json")
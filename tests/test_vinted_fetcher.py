@@ -0,0 +1,433 @@
+import pytest
+
+import vinted_fetcher
+from vinted_fetcher import (
+    TokenBucket,
+    _NEXT_DATA_OPEN_BYTES,
+    _iter_capped,
+    _read_until_next_data,
+    _scrape_html_lexbor,
+    _scrape_html_soup,
+    fetch_vinted_items,
+    live_result,
+    mock_result,
+    parse_item,
+    parse_items,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+
+# ===== Streamed reads =====
+
+def _chunks(data: bytes, size: int):
+    return iter([data[i:i + size] for i in range(0, len(data), size)])
+
+
+PAGE = (
+    b"<html><head>" + _NEXT_DATA_OPEN_BYTES + b'{"props":{}}</script></head>'
+    + b"<body>" + b"x" * 1000 + b"</body></html>"
+)
+
+
+@pytest.mark.parametrize("size", [1, 7, 16, len(_NEXT_DATA_OPEN_BYTES), 64, len(PAGE)])
+def test_read_until_next_data_stops_after_script_at_any_chunk_boundary(size):
+    body = _read_until_next_data(_chunks(PAGE, size))
+    
+    end = PAGE.index(b"</script>") + len(b"</script>")
+    assert body.startswith(PAGE[:end])
+    # Nothing past the chunk holding the closing tag is read
+    assert len(body) < end + size
+
+
+def test_read_until_next_data_ignores_script_close_before_next_data():
+    page = b"<script>var a;</script>" + PAGE
+    body = _read_until_next_data(_chunks(page, 5))
+    assert b'{"props":{}}</script>' in body
+
+
+def test_read_until_next_data_reads_everything_without_next_data():
+    page = b"<html><script>x</script>" + b"y" * 500 + b"</html>"
+    chunks = _chunks(page, 32)
+    assert _read_until_next_data(chunks) == page
+    assert next(chunks, None) is None
+
+
+def test_iter_capped_passes_chunks_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(vinted_fetcher, "MAX_BODY_BYTES", 10)
+    assert list(_iter_capped(_chunks(b"x" * 10, 4))) == [b"xxxx", b"xxxx", b"xx"]
+
+
+def test_iter_capped_raises_past_the_cap(monkeypatch):
+    monkeypatch.setattr(vinted_fetcher, "MAX_BODY_BYTES", 10)
+    with pytest.raises(RuntimeError, match="too large"):
+        list(_iter_capped(_chunks(b"x" * 11, 4)))
+
+
+def test_read_until_next_data_gives_up_on_oversized_pages(monkeypatch):
+    monkeypatch.setattr(vinted_fetcher, "MAX_BODY_BYTES", 100)
+    page = b"<html>" + b"y" * 500 + PAGE
+    with pytest.raises(RuntimeError, match="too large"):
+        _read_until_next_data(_iter_capped(_chunks(page, 32)))
+
+
+# ===== Cookie warm-up =====
+
+class FakeWarmUpSession:
+    """Serves a home page of body_size bytes, recording how much of it was read."""
+    
+    def __init__(self, body_size):
+        self.cookies = {}
+        self.body_size = body_size
+        self.get_kwargs = None
+        self.bytes_read = 0
+    
+    def iter_content(self, chunk_size):
+        for start in range(0, self.body_size, chunk_size):
+            chunk = b"x" * min(chunk_size, self.body_size - start)
+            self.bytes_read += len(chunk)
+            yield chunk
+    
+    def get(self, url, **kwargs):
+        self.get_kwargs = kwargs
+        return self
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.mark.parametrize("body_size, warmed_up", [(1000, True), (1_000_000, False)])
+def test_cookie_warm_up_streams_the_home_page_up_to_the_cap(monkeypatch, body_size, warmed_up):
+    monkeypatch.setattr(vinted_fetcher, "MAX_BODY_BYTES", 10_000)
+    monkeypatch.setattr(vinted_fetcher, "STREAM_CHUNK_SIZE", 1024)
+    session = FakeWarmUpSession(body_size)
+    monkeypatch.setattr(vinted_fetcher, "_SESSIONS", {"www.vinted.fr": (session, 0.0)})
+    
+    assert vinted_fetcher._get_session("www.vinted.fr") is session
+    
+    assert session.get_kwargs["stream"] is True
+    assert session.bytes_read <= 10_000 + 1024
+    assert (vinted_fetcher._SESSIONS["www.vinted.fr"][1] > 0) is warmed_up
+
+
+# ===== Rate limiting =====
+
+def test_token_bucket_allows_burst_then_spaces_requests(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(vinted_fetcher.time, "monotonic", clock)
+    bucket = TokenBucket(rate=1.0, capacity=3)
+    
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert bucket.acquire() == pytest.approx(2.0)
+
+
+def test_token_bucket_refills_up_to_capacity(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(vinted_fetcher.time, "monotonic", clock)
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    
+    clock.now += 0.5
+    assert bucket.acquire() == 0.0
+    
+    clock.now += 60
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+
+
+# ===== HTML scraping =====
+
+ITEM_LINKS_PAGE = """
+<html><body>
+  <div><a href="/items/101-jacket" title="Jacket">Jacket</a><span>12,50 €</span></div>
+  <div><a href="/items/202-coat">Coat</a><p>30 €</p></div>
+  <div><a href="/help">Help</a></div>
+</body></html>
+"""
+
+SCRAPERS = [
+    pytest.param(
+        _scrape_html_lexbor,
+        marks=pytest.mark.skipif(vinted_fetcher.LexborHTMLParser is None, reason="selectolax not available"),
+        id="selectolax",
+    ),
+    pytest.param(_scrape_html_soup, id="bs4"),
+]
+
+
+@pytest.mark.parametrize("scrape", SCRAPERS)
+def test_scrape_html_reads_item_links(scrape):
+    assert scrape(ITEM_LINKS_PAGE, "www.vinted.fr", 10) == [
+        {"id": "101", "title": "Jacket", "price": "12,50 €", "url": "https://www.vinted.fr/items/101"},
+        {"id": "202", "title": "Coat", "price": "30 €", "url": "https://www.vinted.fr/items/202"},
+    ]
+
+
+@pytest.mark.parametrize("scrape", SCRAPERS)
+def test_scrape_html_stops_at_per_page(scrape):
+    assert [item["id"] for item in scrape(ITEM_LINKS_PAGE, "www.vinted.fr", 1)] == ["101"]
+
+
+@pytest.mark.parametrize("scrape", SCRAPERS)
+def test_scrape_html_skips_links_without_numeric_item_id(scrape):
+    page = '<div><a href="/items/new">Sell</a></div><div><a href="/items/303-bag">Bag</a></div>'
+    assert [item["id"] for item in scrape(page, "www.vinted.fr", 10)] == ["303"]
+
+
+@pytest.mark.parametrize("scrape", SCRAPERS)
+@pytest.mark.parametrize("card", [
+    '<div data-testid="product-grid-item-1">',
+    '<div class="feed-grid__item is-visible">',
+])
+def test_scrape_html_item_cards_take_precedence_over_links(scrape, card):
+    page = card + '<a href="/items/101-jacket">Jacket</a></div>'
+    assert scrape(page, "www.vinted.fr", 10) == []
+
+
+def test_extract_items_falls_back_to_html_links():
+    items = vinted_fetcher.extract_items(ITEM_LINKS_PAGE, "www.vinted.de", 10)
+    assert [item["url"] for item in items] == [
+        "https://www.vinted.de/items/101",
+        "https://www.vinted.de/items/202",
+    ]
+
+
+# ===== Response cache =====
+
+LIVE_ITEMS = [{"id": "1", "title": "Jacket", "price": {"amount": "10.0", "currency_code": "EUR"}}]
+BLOCKED = "Vinted returned status 403"
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """Stub _fetch_catalog with a queue of (result, validators) answers, recording the headers sent."""
+    clock = FakeClock()
+    monkeypatch.setattr(vinted_fetcher.time, "monotonic", clock)
+    monkeypatch.setattr(vinted_fetcher, "_RESPONSE_CACHE", {})
+    
+    answers = []
+    sent_headers = []
+    
+    def fake_fetch_catalog(*args):
+        sent_headers.append(args[-1])
+        return answers.pop(0)
+    
+    monkeypatch.setattr(vinted_fetcher, "_fetch_catalog", fake_fetch_catalog)
+    return clock, answers, sent_headers
+
+
+def test_fetch_serves_cached_result_within_ttl(catalog):
+    clock, answers, sent_headers = catalog
+    answers.append((live_result(LIVE_ITEMS), {"etag": '"v1"', "last_modified": None}))
+    
+    first = fetch_vinted_items("jacket")
+    clock.now += vinted_fetcher.CACHE_TTL_SECONDS - 1
+    second = fetch_vinted_items("jacket")
+    
+    assert second is first
+    assert sent_headers == [{}]
+
+
+def test_fetch_cache_is_keyed_by_search(catalog):
+    _, answers, sent_headers = catalog
+    answers.extend([(live_result(LIVE_ITEMS), {}), (live_result(LIVE_ITEMS), {})])
+    
+    fetch_vinted_items("jacket")
+    fetch_vinted_items("jacket", price_to=50)
+    
+    assert len(sent_headers) == 2
+
+
+def test_fetch_does_not_cache_mock_results(catalog):
+    _, answers, sent_headers = catalog
+    answers.extend([(mock_result("jacket", 5, BLOCKED), {}), (mock_result("jacket", 5, BLOCKED), {})])
+    
+    fetch_vinted_items("jacket")
+    fetch_vinted_items("jacket")
+    
+    assert sent_headers == [{}, {}]
+
+
+def test_fetch_revalidates_after_ttl_and_serves_cache_on_304(catalog):
+    clock, answers, sent_headers = catalog
+    answers.append((live_result(LIVE_ITEMS), {"etag": '"v1"', "last_modified": "Tue, 01 Oct 2024 10:00:00 GMT"}))
+    answers.append((None, {}))
+    
+    first = fetch_vinted_items("jacket")
+    clock.now += vinted_fetcher.CACHE_TTL_SECONDS + 1
+    second = fetch_vinted_items("jacket")
+    
+    assert second is first
+    assert sent_headers[1] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Tue, 01 Oct 2024 10:00:00 GMT",
+    }
+    # The 304 refreshed the entry, so the next call is a cache hit again
+    fetch_vinted_items("jacket")
+    assert len(sent_headers) == 2
+
+
+def test_fetch_304_without_cached_page_falls_back_to_mock(catalog):
+    _, answers, sent_headers = catalog
+    answers.append((None, {}))
+    
+    result = fetch_vinted_items("jacket")
+    
+    assert sent_headers == [{}]
+    assert result["source"] == "mock"
+    assert result["blocked_reason"] == "Vinted returned status 304 without a cached page"
+
+
+def test_fetch_revalidated_page_replaces_cache_entry(catalog):
+    clock, answers, sent_headers = catalog
+    new_items = [{"id": "2", "title": "Coat"}]
+    answers.append((live_result(LIVE_ITEMS), {"etag": '"v1"', "last_modified": None}))
+    answers.append((live_result(new_items), {"etag": '"v2"', "last_modified": None}))
+    answers.append((None, {}))
+    
+    fetch_vinted_items("jacket")
+    clock.now += vinted_fetcher.CACHE_TTL_SECONDS + 1
+    assert fetch_vinted_items("jacket")["items"] == new_items
+    
+    clock.now += vinted_fetcher.CACHE_TTL_SECONDS + 1
+    assert fetch_vinted_items("jacket")["items"] == new_items
+    assert sent_headers[2] == {"If-None-Match": '"v2"'}
+
+
+def test_fetch_serves_stale_items_when_refetch_fails(catalog):
+    clock, answers, _ = catalog
+    answers.append((live_result(LIVE_ITEMS), {}))
+    answers.append((mock_result("jacket", 5, BLOCKED), {}))
+    
+    fetch_vinted_items("jacket")
+    clock.now += vinted_fetcher.CACHE_TTL_SECONDS + 1
+    result = fetch_vinted_items("jacket")
+    
+    assert result["source"] == "stale"
+    assert result["items"] == LIVE_ITEMS
+    assert result["blocked_reason"] == BLOCKED
+
+
+def test_fetch_returns_mock_once_stale_items_are_too_old(catalog):
+    clock, answers, _ = catalog
+    answers.append((live_result(LIVE_ITEMS), {}))
+    answers.append((mock_result("jacket", 5, BLOCKED), {}))
+    
+    fetch_vinted_items("jacket")
+    clock.now += 2 * vinted_fetcher.CACHE_TTL_SECONDS + 1
+    result = fetch_vinted_items("jacket")
+    
+    assert result["source"] == "mock"
+
+
+# ===== Embedded state =====
+
+class RecordingPattern:
+    def __init__(self):
+        self.searched = 0
+    
+    def search(self, html):
+        self.searched += 1
+        return None
+
+
+def test_extract_items_reads_initial_state():
+    html = '<script>window.__INITIAL_STATE__ = {"catalog": {"items": [{"id": 5}]}};</script>'
+    assert vinted_fetcher.extract_items(html, "www.vinted.fr", 10) == [{"id": 5}]
+
+
+def test_extract_items_skips_patterns_whose_sentinel_is_absent(monkeypatch):
+    absent, present = RecordingPattern(), RecordingPattern()
+    monkeypatch.setattr(vinted_fetcher, "_PRELOAD_PATTERNS", (
+        ("__PRELOADED_STATE__", absent),
+        ("__INITIAL_STATE__", present),
+    ))
+    
+    vinted_fetcher.extract_items("<script>window.__INITIAL_STATE__ = 1;</script>", "www.vinted.fr", 10)
+    
+    assert absent.searched == 0
+    assert present.searched == 1
+
+
+# ===== Item parsing =====
+
+def test_parse_item_catalog_json():
+    raw = {
+        "id": 42,
+        "title": "Jacket",
+        "price": {"amount": "19.99", "currency_code": "GBP"},
+        "brand_title": "Levi's",
+        "size_title": "M",
+        "url": "https://www.vinted.co.uk/items/42",
+        "photo": {"url": "https://images.vinted.net/42.jpg"},
+    }
+    parsed = parse_item(raw)
+    
+    assert parsed["item_id"] == "42"
+    assert parsed["title"] == "Jacket"
+    assert parsed["price"] == 19.99
+    assert parsed["currency"] == "GBP"
+    assert parsed["brand"] == "Levi's"
+    assert parsed["size"] == "M"
+    assert parsed["url"] == "https://www.vinted.co.uk/items/42"
+    assert parsed["photo_url"] == "https://images.vinted.net/42.jpg"
+    assert parsed["is_mock"] is False
+
+
+@pytest.mark.parametrize("price, cents", [
+    ("19,99 €", 1999),
+    (0.1 + 0.2, 30),
+    ({"amount": "1234.56"}, 123456),
+    (None, 0),
+])
+def test_parse_item_price_cents(price, cents):
+    parsed = parse_item({"id": "1", "price": price})
+    assert parsed["price_cents"] == cents
+    assert isinstance(parsed["price_cents"], int)
+
+
+@pytest.mark.parametrize("price, expected", [
+    ("15,00 €", 15.0),
+    ("€15.50", 15.5),
+    ("free", 0),
+    (12, 12.0),
+    (None, 0),
+    ({"amount": None}, 0),
+])
+def test_parse_item_price_formats(price, expected):
+    parsed = parse_item({"id": "1", "price": price})
+    assert parsed["price"] == expected
+    assert parsed["currency"] == "EUR"
+
+
+def test_parse_item_scraped_defaults():
+    parsed = parse_item({"item_id": "7", "photo": "https://images.vinted.net/7.jpg", "_mock": True})
+    
+    assert parsed["item_id"] == "7"
+    assert parsed["url"] == "https://www.vinted.fr/items/7"
+    assert parsed["photo_url"] == "https://images.vinted.net/7.jpg"
+    assert parsed["brand"] == "" and parsed["size"] == "" and parsed["title"] == ""
+    assert parsed["is_mock"] is True
+
+
+def test_parse_item_keeps_raw_payload_only_on_request():
+    raw = {"id": "1", "price": {"amount": "5"}}
+    assert "raw_json" not in parse_item(raw)
+    assert parse_item(raw, keep_raw=True)["raw_json"] is raw
+
+
+def test_parse_items_matches_parse_item():
+    raw_items = [{"id": "1", "price": "3 €"}, {"id": "2", "price": {"amount": "4.5"}}]
+    assert parse_items(raw_items) == [parse_item(raw) for raw in raw_items]
+    assert parse_items(raw_items, keep_raw=True)[1]["raw_json"] is raw_items[1]
@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import vinted_fetcher_async
+from vinted_fetcher_async import fetch_many
+
+
+def _next_data_page(page_props, ensure_ascii=True):
+    next_data = json.dumps({"props": {"pageProps": page_props}}, ensure_ascii=ensure_ascii)
+    return f'<html><head><script id="__NEXT_DATA__" type="application/json">{next_data}</script></head></html>'
+
+
+def _catalog_page(items):
+    return _next_data_page({"catalog": {"items": items}})
+
+
+ITEMS = [{"id": 1, "title": "Jacket"}, {"id": 2, "title": "Coat"}]
+
+
+def _catalog_app(hits, home_page="<html></html>"):
+    """Local stand-in for a Vinted domain: a home page and a catalog keyed by search_text."""
+    async def home(request):
+        hits.append("/")
+        return web.Response(text=home_page, content_type="text/html")
+    
+    async def catalog(request):
+        search_text = request.query.get("search_text", "")
+        hits.append(f"/catalog?{search_text}")
+        if search_text == "blocked":
+            return web.Response(status=403)
+        if search_text == "broken":
+            # A null catalog makes extract_items raise
+            page = _next_data_page({"catalog": None})
+            return web.Response(text=page, content_type="text/html", charset="utf-8")
+        return web.Response(text=_catalog_page(ITEMS), content_type="text/html", charset="utf-8")
+    
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/catalog", catalog)
+    return app
+
+
+@pytest.fixture
+def vinted_server(monkeypatch):
+    """Route requests for www.vinted.fr to a local server and disable rate limiting."""
+    monkeypatch.setattr(vinted_fetcher_async._LIMITER, "acquire", lambda: 0.0)
+    hits = []
+    state = {}
+    
+    original_get = aiohttp.ClientSession.get
+    
+    def get(self, url, **kwargs):
+        return original_get(self, str(url).replace("https://www.vinted.fr", state["base"]), **kwargs)
+    
+    monkeypatch.setattr(aiohttp.ClientSession, "get", get)
+    
+    def run(queries, app=None):
+        async def main():
+            async with TestServer(app or _catalog_app(hits)) as server:
+                state["base"] = str(server.make_url("")).rstrip("/")
+                return await fetch_many(queries)
+        return asyncio.run(main())
+    
+    return run, hits
+
+
+def test_fetch_many_without_queries():
+    assert asyncio.run(fetch_many([])) == []
+
+
+def test_fetch_many_keeps_query_order_and_falls_back_per_query(vinted_server):
+    run, hits = vinted_server
+    
+    results = run([
+        {"search_text": "jacket", "per_page": 5},
+        {"search_text": "blocked", "per_page": 3},
+        {"search_text": "coat", "per_page": 1},
+    ])
+    
+    assert [r["source"] for r in results] == ["live", "mock", "live"]
+    assert results[0]["items"] == ITEMS
+    assert results[1]["blocked_reason"] == "Vinted returned status 403"
+    assert len(results[1]["items"]) == 3
+    assert results[2]["items"] == ITEMS[:1]
+
+
+def test_fetch_many_warms_up_cookies_once_per_domain(vinted_server):
+    run, hits = vinted_server
+    
+    run([{"search_text": "jacket"}, {"search_text": "coat"}])
+    
+    assert hits[0] == "/"
+    assert hits.count("/") == 1
+    assert sorted(hits[1:]) == ["/catalog?coat", "/catalog?jacket"]
+
+
+def test_fetch_many_falls_back_to_mock_when_extraction_raises(vinted_server):
+    run, hits = vinted_server
+    
+    results = run([{"search_text": "broken", "per_page": 2}, {"search_text": "jacket"}])
+    
+    assert results[0]["source"] == "mock"
+    assert results[0]["blocked_reason"].startswith("Request failed:")
+    assert results[1]["items"] == ITEMS
+
+
+def test_fetch_many_decodes_html_without_charset_as_utf8(vinted_server):
+    run, hits = vinted_server
+    items = [{"id": 1, "title": "Veste délavée"}]
+    
+    async def home(request):
+        return web.Response(text="<html></html>", content_type="text/html")
+    
+    async def catalog(request):
+        # No charset in the Content-Type, so aiohttp's get_encoding() would raise
+        page = _next_data_page({"catalog": {"items": items}}, ensure_ascii=False)
+        return web.Response(body=page.encode(), content_type="text/html")
+    
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/catalog", catalog)
+    
+    results = run([{"search_text": "veste"}], app=app)
+    
+    assert results[0]["source"] == "live"
+    assert results[0]["items"] == items
+
+
+def test_fetch_many_caps_the_cookie_warm_up_body(vinted_server, monkeypatch, caplog):
+    run, hits = vinted_server
+    monkeypatch.setattr(vinted_fetcher_async, "MAX_BODY_BYTES", 10_000)
+    
+    results = run([{"search_text": "jacket"}], app=_catalog_app(hits, home_page="x" * 1_000_000))
+    
+    assert any("Cookie warm-up failed" in r.getMessage() and "too large" in r.getMessage() for r in caplog.records)
+    # The searches still run after an oversized home page
+    assert results[0]["source"] == "live"
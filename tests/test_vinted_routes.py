@@ -0,0 +1,402 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import vinted_routes
+from vinted_routes import (
+    STATS_DIGEST_SIZE,
+    _median,
+    _running_price_stats,
+    _seed_running_stats,
+    _store_fetch_result,
+    _stream_items,
+    _update_running_stats,
+)
+from vinted_fetcher import live_result
+
+
+# ===== Median =====
+
+@pytest.mark.parametrize("values", [
+    [5.0],
+    [3.0, 1.0],
+    [9.0, 1.0, 5.0],
+    [4.0, 4.0, 1.0, 7.0],
+    list(np.random.default_rng(0).integers(1, 10_000, size=1001).astype(float)),
+    list(np.random.default_rng(1).integers(1, 10_000, size=1000).astype(float)),
+])
+def test_median_matches_numpy(values):
+    assert _median(np.asarray(values)) == pytest.approx(float(np.median(values)))
+
+
+# ===== Fake database =====
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+    
+    def sort(self, *args):
+        return self
+    
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeCollection:
+    """Records calls and answers them from canned results."""
+    
+    def __init__(
+        self,
+        upserted_ids=None,
+        aggregate_result=None,
+        find_result=None,
+        find_one_and_update_result=None,
+        bulk_write_error=None,
+    ):
+        self.calls = []
+        self.upserted_ids = upserted_ids or {}
+        self.bulk_write_error = bulk_write_error
+        self.aggregate_result = aggregate_result or []
+        self.find_result = find_result or []
+        self.find_one_and_update_result = find_one_and_update_result
+    
+    async def bulk_write(self, ops, **kwargs):
+        self.calls.append(("bulk_write", (ops,), kwargs))
+        if self.bulk_write_error is not None:
+            raise self.bulk_write_error
+        return SimpleNamespace(upserted_count=len(self.upserted_ids), upserted_ids=self.upserted_ids)
+    
+    async def update_one(self, *args, **kwargs):
+        self.calls.append(("update_one", args, kwargs))
+    
+    async def find_one_and_update(self, *args, **kwargs):
+        self.calls.append(("find_one_and_update", args, kwargs))
+        return self.find_one_and_update_result
+    
+    async def find_one(self, *args, **kwargs):
+        self.calls.append(("find_one", args, kwargs))
+        return {"query_id": "q", "sum_cents": 0, "n": 0, "digest": [], "seeded": True}
+    
+    def aggregate(self, pipeline):
+        self.calls.append(("aggregate", (pipeline,), {}))
+        return FakeCursor(self.aggregate_result)
+    
+    def find(self, *args):
+        self.calls.append(("find", args, {}))
+        return FakeCursor(self.find_result)
+
+
+class FakeDb:
+    def __init__(self, items, queries, running):
+        self.vinted_items = items
+        self.vinted_queries = queries
+        self.vinted_stats_running = running
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    def install(items=None, queries=None, running=None):
+        db = FakeDb(items or FakeCollection(), queries or FakeCollection(), running or FakeCollection())
+        monkeypatch.setattr(vinted_routes, "db", db)
+        return db
+    return install
+
+
+# ===== Indexes =====
+
+class IndexCollection:
+    def __init__(self, name, error=None):
+        self.name = name
+        self.error = error
+        self.created = []
+    
+    async def create_index(self, keys, unique=False):
+        if self.error is not None:
+            raise self.error
+        self.created.append((keys, unique))
+
+
+def test_ensure_indexes_logs_failures_and_keeps_going(monkeypatch, caplog):
+    items = IndexCollection("vinted_items", DuplicateKeyError("E11000 duplicate key", code=11000))
+    daily = IndexCollection("vinted_stats_daily", OperationFailure("not authorized", code=13))
+    running = IndexCollection("vinted_stats_running")
+    monkeypatch.setattr(vinted_routes, "db", SimpleNamespace(
+        vinted_items=items, vinted_stats_daily=daily, vinted_stats_running=running
+    ))
+    
+    asyncio.run(vinted_routes.ensure_indexes())
+    
+    assert running.created == [([("query_id", 1)], True)]
+    messages = [record.getMessage() for record in caplog.records]
+    assert sum("duplicate documents already exist" in m for m in messages) == 2
+    assert any("Failed to create index" in m and "vinted_stats_daily" in m for m in messages)
+
+
+# ===== Saved queries =====
+
+@pytest.mark.parametrize("saved, warned", [
+    (vinted_routes.MAX_QUERIES, False),
+    (vinted_routes.MAX_QUERIES + 1, True),
+])
+def test_list_queries_caps_and_warns_only_past_the_limit(monkeypatch, caplog, saved, warned):
+    docs = [{"id": str(i)} for i in range(saved)]
+    requested = []
+    
+    class QueryCursor:
+        async def to_list(self, length):
+            requested.append(length)
+            return docs[:length]
+    
+    monkeypatch.setattr(vinted_routes, "cache", None)
+    monkeypatch.setattr(vinted_routes, "db", SimpleNamespace(
+        vinted_queries=SimpleNamespace(find=lambda *args: QueryCursor())
+    ))
+    
+    queries = asyncio.run(vinted_routes.list_queries())
+    
+    assert requested == [vinted_routes.MAX_QUERIES + 1]
+    assert queries == docs[:vinted_routes.MAX_QUERIES]
+    assert any("saved queries" in r.getMessage() for r in caplog.records) is warned
+
+
+# ===== Storing fetched items =====
+
+
+FETCHED = [
+    {"id": "1", "title": "Jacket", "price": "10 €"},
+    {"id": "2", "title": "Coat", "price": "20 €"},
+    {"id": "3", "title": "Bag", "price": "5 €"},
+]
+
+
+def test_store_fetch_result_counts_new_items_from_upserts(fake_db):
+    # Only the second item was missing, the others matched existing documents
+    db = fake_db(items=FakeCollection(upserted_ids={1: "oid"}))
+    
+    result = asyncio.run(_store_fetch_result("q", live_result(FETCHED)))
+    
+    assert (result.items_fetched, result.items_new, result.items_existing) == (3, 1, 2)
+    
+    (name, (ops,), kwargs), = db.vinted_items.calls
+    assert kwargs == {"ordered": False}
+    assert [op._filter for op in ops] == [{"query_id": "q", "item_id": i} for i in ("1", "2", "3")]
+    assert all(op._upsert for op in ops)
+    
+    (name, (query, update), kwargs), = db.vinted_queries.calls
+    assert query == {"id": "q"}
+    assert update["$set"]["last_fetch_items_new"] == 1
+    assert update["$set"]["last_fetch_items_existing"] == 2
+
+
+def test_store_fetch_result_folds_only_new_prices_into_running_stats(fake_db):
+    db = fake_db(items=FakeCollection(upserted_ids={2: "oid", 0: "oid"}))
+    
+    asyncio.run(_store_fetch_result("q", live_result(FETCHED)))
+    
+    (name, (query, update), kwargs), = db.vinted_stats_running.calls
+    assert update["$inc"] == {"sum_cents": 1500, "n": 2}
+    assert update["$push"]["digest"]["$each"] == [1000, 500]
+    
+    # The stored documents carry the marker that keeps the seed from counting them again
+    (name, (ops,), kwargs), = db.vinted_items.calls
+    assert all(op._doc["$setOnInsert"]["in_running_stats"] is True for op in ops)
+
+
+def test_store_fetch_result_folds_partial_upserts_before_raising(fake_db):
+    error = BulkWriteError({
+        "writeErrors": [{"index": 1, "code": 11000, "errmsg": "E11000 duplicate key"}],
+        "upserted": [{"index": 2, "_id": "oid"}, {"index": 0, "_id": "oid"}],
+        "nUpserted": 2,
+    })
+    db = fake_db(items=FakeCollection(bulk_write_error=error))
+    
+    with pytest.raises(BulkWriteError):
+        asyncio.run(_store_fetch_result("q", live_result(FETCHED)))
+    
+    (name, (query, update), kwargs), = db.vinted_stats_running.calls
+    assert update["$inc"] == {"sum_cents": 1500, "n": 2}
+    assert update["$push"]["digest"]["$each"] == [1000, 500]
+    assert db.vinted_queries.calls == []
+
+
+def test_store_fetch_result_without_items_skips_the_write(fake_db):
+    db = fake_db()
+    
+    result = asyncio.run(_store_fetch_result("q", live_result([])))
+    
+    assert (result.items_new, result.items_existing) == (0, 0)
+    assert db.vinted_items.calls == []
+
+
+# ===== Query ids =====
+
+@pytest.fixture
+def client(monkeypatch):
+    # No database: a request that gets past validation would fail loudly
+    monkeypatch.setattr(vinted_routes, "db", None)
+    app = FastAPI()
+    app.include_router(vinted_routes.vinted_router)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize("path", [
+    "/api/vinted/queries/{}/items",
+    "/api/vinted/queries/{}/stats",
+    "/api/vinted/queries/{}/last-fetch",
+])
+@pytest.mark.parametrize("query_id", [
+    "not-an-id",
+    "65f0c0ffee65f0c0ffee65f",
+    "65F0C0FFEE65F0C0FFEE65F0",
+    "{\"$ne\": null}",
+])
+def test_malformed_query_id_is_rejected_with_422(client, path, query_id):
+    response = client.get(path.format(query_id))
+    assert response.status_code == 422
+
+
+# ===== Streamed items =====
+
+class AsyncCursor:
+    def __init__(self, docs):
+        self.docs = iter(docs)
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        try:
+            return next(self.docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _stream_body(query_id, docs):
+    async def collect():
+        # get_items reads the first document itself before streaming the rest
+        cursor = AsyncCursor(docs)
+        first = await cursor.__anext__() if docs else None
+        return b"".join([chunk async for chunk in _stream_items(query_id, first, cursor)])
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("docs", [
+    [],
+    [{"item_id": "1", "price": 10.0}],
+    [{"item_id": "1", "price": 10.0}, {"item_id": "2", "title": "Coat \"long\""}],
+])
+def test_stream_items_body_matches_the_buffered_response(docs):
+    body = _stream_body("q", docs)
+    assert json.loads(body) == {"query_id": "q", "items": docs, "count": len(docs)}
+
+
+
+@pytest.mark.parametrize("limit", [0, -1, vinted_routes.MAX_ITEMS_LIMIT + 1])
+def test_get_items_rejects_out_of_range_limits(client, limit):
+    response = client.get(f"/api/vinted/queries/65f0c0ffee65f0c0ffee65f0/items?limit={limit}")
+    assert response.status_code == 422
+
+
+class FailingCursor:
+    def sort(self, *args):
+        return self
+    
+    def limit(self, n):
+        return self
+    
+    def batch_size(self, n):
+        return self
+    
+    async def next(self):
+        raise RuntimeError("database unavailable")
+
+
+def test_get_items_query_error_is_a_500_not_a_truncated_200(client, monkeypatch):
+    monkeypatch.setattr(vinted_routes, "db", SimpleNamespace(
+        vinted_items=SimpleNamespace(find=lambda *args: FailingCursor())
+    ))
+    response = client.get("/api/vinted/queries/65f0c0ffee65f0c0ffee65f0/items")
+    assert response.status_code == 500
+
+
+# ===== Running stats =====
+
+def test_running_price_stats_reads_cents():
+    running = {"sum_cents": 3000, "n": 3, "digest": [500, 1000, 1500]}
+    assert _running_price_stats(running) == (1000.0, 1000.0, 3)
+
+
+@pytest.mark.parametrize("running", [
+    {"sum_cents": 0, "n": 0, "digest": []},
+    {"sum_cents": 0, "n": 0},
+])
+def test_running_price_stats_empty(running):
+    assert _running_price_stats(running) == (None, None, 0)
+
+
+def test_update_running_stats_skips_free_items_and_upserts(fake_db):
+    db = fake_db()
+    
+    asyncio.run(_update_running_stats("q", [1250, 0, 999]))
+    
+    (name, (query, update), kwargs), = db.vinted_stats_running.calls
+    assert query == {"query_id": "q"}
+    assert update["$inc"] == {"sum_cents": 2249, "n": 2}
+    assert update["$push"]["digest"] == {"$each": [1250, 999], "$slice": -STATS_DIGEST_SIZE}
+    assert kwargs == {"upsert": True}
+
+
+def test_update_running_stats_without_priced_items_is_a_noop(fake_db):
+    db = fake_db()
+    asyncio.run(_update_running_stats("q", [0, 0]))
+    assert db.vinted_stats_running.calls == []
+
+
+def test_seed_folds_unmarked_items_once_oldest_first(fake_db):
+    seeded = {"query_id": "q", "sum_cents": 4249, "n": 3, "digest": [1000, 1250, 1999], "seeded": True}
+    db = fake_db(
+        items=FakeCollection(
+            aggregate_result=[{"_id": None, "sum_cents": 2250.0, "n": 2}],
+            # Newest first, as sorted by created_at desc; the older one predates price_cents
+            find_result=[{"price": 12.5, "price_cents": 1250}, {"price": 9.999}],
+        ),
+        running=FakeCollection(find_one_and_update_result=seeded),
+    )
+    
+    running = asyncio.run(_seed_running_stats("q"))
+    assert running is seeded
+    
+    # Only items not already counted by a fetch are scanned
+    match = db.vinted_items.calls[0][1][0][0]["$match"]
+    assert match["in_running_stats"] == {"$exists": False}
+    assert db.vinted_items.calls[1][1][0] == match
+    
+    create, fold = db.vinted_stats_running.calls
+    assert create[0] == "update_one" and create[2] == {"upsert": True}
+    assert create[1][1] == {"$setOnInsert": {"sum_cents": 0, "n": 0, "digest": []}}
+    
+    query, update = fold[1]
+    assert fold[0] == "find_one_and_update"
+    assert query == {"query_id": "q", "seeded": {"$ne": True}}
+    assert update["$inc"] == {"sum_cents": 2250, "n": 2}
+    assert update["$push"]["digest"] == {
+        "$each": [1000, 1250],
+        "$position": 0,
+        "$slice": -STATS_DIGEST_SIZE,
+    }
+    assert update["$set"] == {"seeded": True}
+
+
+def test_seed_lost_race_reads_the_seeded_doc(fake_db):
+    db = fake_db(running=FakeCollection(find_one_and_update_result=None))
+    
+    running = asyncio.run(_seed_running_stats("q"))
+    
+    assert running["seeded"] is True
+    assert db.vinted_stats_running.calls[-1][0] == "find_one"